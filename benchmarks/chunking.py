@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for TTS chunking and map-reduce sectioning.
+
+Run from the repository root:
+
+    python benchmarks/chunking.py
+    python benchmarks/chunking.py --sizes 50000 500000 --repeat 5
+
+Each size is a synthetic summary of short sentences and paragraphs. Times
+are the best of --repeat runs, so the chars/s column shows how chunking
+scales with input length.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from corpus import synthetic_summary  # noqa: E402
+
+DEFAULT_SIZES = (50_000, 100_000, 200_000, 500_000)
+
+
+def best_time(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(sizes, repeat):
+    cases = (
+        ("split_text_for_tts", lambda text: main.split_text_for_tts(text)),
+        (
+            "split_text_into_sections",
+            lambda text: main.split_text_into_sections(
+                text, main.DEFAULT_MAP_REDUCE_SECTION_TOKENS
+            ),
+        ),
+    )
+    print(f"{'case':<26}{'chars':>10}{'chunks':>8}{'seconds':>10}{'chars/s':>12}")
+    for name, split in cases:
+        for size in sizes:
+            text = synthetic_summary(size)
+            seconds, chunks = best_time(lambda: split(text), repeat)
+            print(
+                f"{name:<26}{len(text):>10}{len(chunks):>8}"
+                f"{seconds:>10.3f}{len(text) / seconds:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Synthetic input sizes in characters",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per size; the best is reported"
+    )
+    benchmark_args = parser.parse_args()
+    run_benchmark(benchmark_args.sizes, benchmark_args.repeat)
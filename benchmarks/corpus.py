@@ -0,0 +1,127 @@
+"""
+Deterministic benchmark inputs.
+
+Everything is generated from fixed seeds, so every run and every machine
+benchmarks exactly the same text and HTML without network access or large
+files checked into the repository.
+"""
+import html
+import random
+
+WORDS = (
+    "the model summarizes each page into short paragraphs that are read "
+    "aloud while later parts are still being generated for the listener "
+    "because latency matters more than anything else in this pipeline"
+).split()
+SUMMARY_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+HTML_SIZES = (20_000, 200_000, 2_000_000)
+UNBROKEN_SIZE = 200_000
+
+
+def synthetic_summary(size, seed=0):
+    """
+    Return about size characters of sentences grouped into paragraphs.
+    """
+    rng = random.Random(seed)
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(2, 6)):
+            words = rng.choices(WORDS, k=rng.randint(6, 24))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size].strip()
+
+
+def unbroken_text(size, alphabet="x"):
+    """
+    Return a string with no whitespace, which forces hard splits.
+    """
+    return (alphabet * (size // len(alphabet) + 1))[:size]
+
+
+def _paragraph(rng):
+    sentences = []
+    for _ in range(rng.randint(3, 7)):
+        words = rng.choices(WORDS, k=rng.randint(8, 20))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return html.escape(" ".join(sentences))
+
+
+def article_html(size, seed=0):
+    """
+    Return an article page of about size bytes wrapped in navigation,
+    sidebar, cookie banner, and footer boilerplate.
+    """
+    rng = random.Random(seed)
+    navigation = "".join(
+        f'<li><a href="/section/{number}">Section {number}</a></li>'
+        for number in range(12)
+    )
+    head = (
+        "<!DOCTYPE html><html><head><title>Benchmark article</title>"
+        "<style>body { font-family: sans-serif; }</style>"
+        "<script>window.analytics = { enabled: true };</script></head><body>"
+        f'<header class="site-header"><nav><ul>{navigation}</ul></nav></header>'
+        '<div class="cookie-banner">We use cookies. <button>Accept</button></div>'
+        '<main><article><h1>Benchmark article</h1>'
+    )
+    tail = (
+        "</article></main>"
+        f'<aside class="sidebar"><h2>Related</h2><ul>{navigation}</ul></aside>'
+        '<footer><p>Copyright Example News</p></footer></body></html>'
+    )
+    body = []
+    length = len(head) + len(tail)
+    while length < size:
+        if rng.random() < 0.15:
+            block = f"<h2>{html.escape(' '.join(rng.choices(WORDS, k=5)))}</h2>"
+        else:
+            block = f"<p>{_paragraph(rng)}</p>"
+        body.append(block)
+        length += len(block)
+    return head + "".join(body) + tail
+
+
+def discussion_html(size, seed=0):
+    """
+    Return a Hacker News style comment thread of about size bytes.
+    """
+    rng = random.Random(seed)
+    head = (
+        "<html><head><title>Benchmark discussion</title></head><body>"
+        '<table id="hnmain"><tr><td><table class="comment-tree">'
+    )
+    tail = "</table></td></tr></table></body></html>"
+    comments = []
+    length = len(head) + len(tail)
+    number = 0
+    while length < size:
+        number += 1
+        indent = rng.randint(0, 5) * 40
+        comment = (
+            f'<tr class="athing comtr" id="{number}"><td>'
+            f'<table><tr><td class="ind"><img src="s.gif" width="{indent}"></td>'
+            f'<td><span class="comhead"><a href="user?id=user{number}">'
+            f"user{number}</a> 2 hours ago | <a href=\"#{number}\">parent</a>"
+            '</span><div class="comment"><div class="commtext">'
+            f"{_paragraph(rng)}<p>{_paragraph(rng)}</p></div>"
+            '<a href="reply">reply</a></div></td></tr></table></td></tr>'
+        )
+        comments.append(comment)
+        length += len(comment)
+    return head + "".join(comments) + tail
+
+
+def html_pages():
+    """
+    Return {name: html} for every benchmark page.
+    """
+    pages = {}
+    for size in HTML_SIZES:
+        pages[f"article-{size // 1000}k"] = article_html(size)
+        pages[f"discussion-{size // 1000}k"] = discussion_html(size)
+    return pages
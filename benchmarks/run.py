@@ -0,0 +1,474 @@
+"""
+Benchmark harness for startup, chunking, HTML extraction, HTML parser
+backends, and the URL pipeline.
+
+Run from the repository root. No network access or API keys are needed:
+pages and provider endpoints are served by a local stub server.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --only startup chunk --repeat 5
+    python benchmarks/run.py --only parser --pages path/to/output/.page_store
+    python benchmarks/run.py --update-baseline
+
+Each case reports the best wall time of --repeat runs, its throughput, and
+the peak memory traced by tracemalloc during one extra run, and compares
+them with benchmarks/baseline.json. Cases more than --tolerance slower or
+larger than the baseline are reported as regressions and make the exit
+status 1.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import tiktoken  # noqa: E402
+
+import main  # noqa: E402
+from corpus import (  # noqa: E402
+    SUMMARY_SIZES,
+    UNBROKEN_SIZE,
+    WORDS,
+    html_pages,
+    synthetic_summary,
+    unbroken_text,
+)
+from stub_server import StubServer  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+GROUPS = ("startup", "chunk", "extract", "parser", "pipeline")
+PIPELINE_PAGES = ("article-20k", "discussion-20k", "article-200k", "discussion-200k")
+PROVIDERS = ("openai", "claude", "ollama")
+MIN_SAMPLE_SECONDS = 0.2
+# The pattern tiktoken uses for o200k_base, so the offline encoding splits
+# text into the same pieces as the real one.
+O200K_PATTERN = "|".join([
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+    r"""\p{N}{1,3}""",
+    r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+    r"""\s*[\r\n]+""",
+    r"""\s+(?!\S)""",
+    r"""\s+""",
+])
+
+
+def offline_encoding():
+    """
+    Return a small BPE encoding for machines that cannot download o200k_base.
+
+    It has byte tokens plus merges for the corpus vocabulary, so token counts
+    are realistic enough to exercise the same chunking paths. Timings taken
+    with it are only comparable with baselines recorded with it.
+    """
+    ranks = {bytes([value]): value for value in range(256)}
+    pieces = set()
+    for word in WORDS:
+        for variant in (word, " " + word, word.capitalize(), " " + word.capitalize()):
+            for start in range(len(variant)):
+                for end in range(start + 2, len(variant) + 1):
+                    pieces.add(variant[start:end].encode("utf-8"))
+    for piece in sorted(pieces, key=lambda piece: (len(piece), piece)):
+        ranks.setdefault(piece, len(ranks))
+    return tiktoken.Encoding(
+        "offline_bpe",
+        pat_str=O200K_PATTERN,
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+
+def select_encoding():
+    """
+    Use the real TTS encoding when it is available, else the offline one.
+    """
+    try:
+        return main.get_tts_encoding().name
+    except Exception:
+        encoding = offline_encoding()
+        main.get_tts_encoding = lambda model=main.DEFAULT_TTS_MODEL: encoding
+        return encoding.name
+
+
+def import_times(module="main"):
+    """
+    Return [(cumulative seconds, name)] for the imports made directly by
+    module when a fresh interpreter imports it, as reported by -X importtime.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # -X importtime lists children before their parent; top-level imports
+    # are indented by one space and their direct children by three.
+    children = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        indent = len(name) - len(name.lstrip())
+        if indent == 3:
+            children.append((int(cumulative) / 1_000_000, name.strip()))
+        elif indent == 1:
+            if name.strip() == module:
+                return sorted(children, reverse=True)
+            children = []
+    return []
+
+
+def print_slowest_imports(count=5):
+    print("slowest imports of main (-X importtime, cumulative):")
+    for seconds, name in import_times()[:count]:
+        print(f"  {name:<40}{seconds:>10.4f}")
+
+
+def startup_cases():
+    def import_main():
+        subprocess.run(
+            [sys.executable, "-c", "import main"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            check=True,
+        )
+
+    return [("startup/import-main", "runs", 1, import_main)]
+
+
+def chunk_cases():
+    encoding = main.get_tts_encoding()
+    limits = (main.TTS_TARGET_MAX_CHARS, main.TTS_TARGET_MAX_TOKENS, encoding)
+    cases = []
+    for size in SUMMARY_SIZES:
+        text = synthetic_summary(size)
+        cases.append(
+            (f"split_text_for_tts/{size}", "chars", len(text),
+             lambda text=text: main.split_text_for_tts(text))
+        )
+
+    sections_text = synthetic_summary(SUMMARY_SIZES[-1])
+    fragments_text = synthetic_summary(100_000)
+    ascii_text = unbroken_text(UNBROKEN_SIZE)
+    unicode_text = unbroken_text(UNBROKEN_SIZE, "語é𝔘ж")
+    cases.extend([
+        ("split_text_into_sections/1000000", "chars", len(sections_text),
+         lambda: main.split_text_into_sections(
+             sections_text, main.DEFAULT_MAP_REDUCE_SECTION_TOKENS
+         )),
+        ("text_fragments/100000", "chars", len(fragments_text),
+         lambda: main._text_fragments(fragments_text, *limits)),
+        (f"hard_split/unbroken-ascii-{UNBROKEN_SIZE}", "chars", len(ascii_text),
+         lambda: main._hard_split_for_tts(ascii_text, *limits)),
+        (f"split_text_for_tts/unbroken-unicode-{UNBROKEN_SIZE}", "chars",
+         len(unicode_text), lambda: main.split_text_for_tts(unicode_text)),
+    ])
+    return cases
+
+
+def extract_cases(pages):
+    return [
+        (f"extract/{name}", "bytes", len(page.encode("utf-8")),
+         lambda page=page: main.extract_main_content(page))
+        for name, page in pages.items()
+    ]
+
+
+def installed_parsers():
+    names = []
+    for name, module in main.HTML_PARSER_MODULES.items():
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def saved_pages(directory):
+    """
+    Return {name: bytes} for the .html files in directory, such as the page
+    store inside OUTPUT_DIR.
+    """
+    return {
+        path.stem[:12]: path.read_bytes()
+        for path in sorted(Path(directory).glob("*.html"))
+    }
+
+
+def print_parser_agreement(documents, backends):
+    """
+    Report, for each backend, the pages whose extracted text differs from
+    html.parser's and where the first difference is.
+    """
+    print("parser agreement with html.parser:")
+    expected = {
+        name: main.extract_main_content(document, "html.parser")
+        for name, document in documents.items()
+    }
+    for backend in backends:
+        if backend == "html.parser":
+            continue
+        differences = []
+        for name, document in documents.items():
+            text = main.extract_main_content(document, backend)
+            if text != expected[name]:
+                offset = next(
+                    (
+                        index
+                        for index, (left, right) in enumerate(zip(text, expected[name]))
+                        if left != right
+                    ),
+                    min(len(text), len(expected[name])),
+                )
+                differences.append(f"{name} (from character {offset})")
+        matching = len(documents) - len(differences)
+        print(f"  {backend:<12}same text on {matching} of {len(documents)} pages")
+        for difference in differences:
+            print(f"    differs: {difference}")
+
+
+def parser_cases(documents, backends):
+    return [
+        (f"parser/{backend}/{name}", "bytes", len(document),
+         lambda document=document, backend=backend: main.extract_main_content(
+             document, backend
+         ))
+        for backend in backends
+        for name, document in documents.items()
+    ]
+
+
+def configure_pipeline(stub, provider, output_dir):
+    os.environ["OPENAI_BASE_URL"] = f"{stub.base_url}/v1"
+    os.environ["ANTHROPIC_BASE_URL"] = stub.base_url
+    main._api_clients.clear()
+    main.OLLAMA_HOST = stub.base_url
+    main.API_KEY = "stub-key"
+    main.CLAUDE_KEY = "stub-key"
+    main.SELECTED_MODEL = f"{provider}-stub-model"
+    main.SELECTED_MODEL_TYPE = provider
+    main.MAX_TOKENS = 4096
+    main.AUDIO_VOICE = "marin"
+    main.AUDIO_MODEL = main.DEFAULT_TTS_MODEL
+    # Parse real flags so options added to main later keep their defaults
+    # here instead of being missing from the namespace.
+    main.args = main.create_argument_parser().parse_args(
+        ["--silent", "--download-only"]
+    )
+    main.OUTPUT_DIR = output_dir
+
+
+def pipeline_cases(stub, output_dir):
+    def run_pages(provider):
+        configure_pipeline(stub, provider, output_dir)
+        for name in PIPELINE_PAGES:
+            url = f"{stub.base_url}/pages/{name}"
+            speech_file_path = Path(output_dir) / f"{provider}-{name}.mp3"
+            contents = main.fetch_page(url, speech_file_path)
+            resp = main.summarize_page(url, contents, speech_file_path)
+            main.download_audio(resp, speech_file_path)
+
+    def run_pages_async():
+        configure_pipeline(stub, "openai", output_dir)
+        urls = [f"{stub.base_url}/pages/{name}" for name in PIPELINE_PAGES]
+        main.process_urls(urls, output_dir, workers=len(urls))
+
+    def run_pages_in_batch(provider):
+        configure_pipeline(stub, provider, output_dir)
+        main.BATCH_POLL_SECONDS = 0
+        urls = [f"{stub.base_url}/pages/{name}" for name in PIPELINE_PAGES]
+        manifest = main.PlaylistManifest(
+            Path(output_dir) / f"batch-{provider}.jsonl", resume=False
+        )
+        try:
+            main.summarize_playlist_in_batch(urls, output_dir, manifest)
+            for url in urls:
+                main.process_single_url(url, output_dir, manifest=manifest)
+        finally:
+            manifest.close()
+
+    return [
+        (f"pipeline/{provider}", "pages", len(PIPELINE_PAGES),
+         lambda provider=provider: run_pages(provider))
+        for provider in PROVIDERS
+    ] + [("pipeline/async-openai", "pages", len(PIPELINE_PAGES), run_pages_async)] + [
+        (f"pipeline/batch-{provider}", "pages", len(PIPELINE_PAGES),
+         lambda provider=provider: run_pages_in_batch(provider))
+        for provider in ("openai", "claude")
+    ]
+
+
+def quiet_spinners():
+    for shared_spinner in (main.spinner, main.audio_spinner):
+        shared_spinner.enabled = False
+
+
+def measure(function, repeat):
+    """
+    Return (best seconds per call, peak traced bytes) for function.
+
+    Fast cases are looped so every timed sample lasts at least
+    MIN_SAMPLE_SECONDS, which keeps timer noise out of the comparison.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        function()
+        first = time.perf_counter() - started
+        loops = max(1, math.ceil(MIN_SAMPLE_SECONDS / max(first, 1e-9)))
+
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                function()
+            elapsed = (time.perf_counter() - started) / loops
+            best = elapsed if best is None else min(best, elapsed)
+
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def compare(result, baseline, tolerance):
+    if baseline is None:
+        return "new"
+
+    time_ratio = result["seconds"] / baseline["seconds"]
+    memory_ratio = result["peak_kib"] / max(baseline["peak_kib"], 1)
+    status = f"{time_ratio:.2f}x time, {memory_ratio:.2f}x memory"
+    if time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+        status += "  REGRESSION"
+    return status
+
+
+def run_benchmarks(groups, repeat, tolerance, update_baseline, pages_dir=None):
+    encoding_name = select_encoding()
+    quiet_spinners()
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    baseline_cases = baseline.get("cases", {})
+    if baseline and baseline.get("encoding") != encoding_name:
+        print(
+            f"Baseline was recorded with {baseline.get('encoding')}, "
+            f"this run uses {encoding_name}; ratios are not comparable"
+        )
+        baseline_cases = {}
+
+    pages = html_pages()
+    results = {}
+    regressions = 0
+    print(f"encoding: {encoding_name}")
+    if "startup" in groups:
+        print_slowest_imports()
+    if "parser" in groups:
+        documents = (
+            saved_pages(pages_dir)
+            if pages_dir
+            else {name: page.encode("utf-8") for name, page in pages.items()}
+        )
+        backends = installed_parsers()
+        print_parser_agreement(documents, backends)
+    print(f"{'case':<44}{'seconds':>10}{'throughput':>20}{'peak KiB':>12}  vs baseline")
+    with StubServer(pages) as stub, tempfile.TemporaryDirectory() as output_dir:
+        cases = []
+        if "startup" in groups:
+            cases.extend(startup_cases())
+        if "chunk" in groups:
+            cases.extend(chunk_cases())
+        if "extract" in groups:
+            cases.extend(extract_cases(pages))
+        if "parser" in groups:
+            cases.extend(parser_cases(documents, backends))
+        if "pipeline" in groups:
+            cases.extend(pipeline_cases(stub, output_dir))
+
+        for name, unit, size, function in cases:
+            seconds, peak = measure(function, repeat)
+            result = {
+                "seconds": round(seconds, 6),
+                "throughput": round(size / seconds, 1),
+                "unit": f"{unit}/s",
+                "peak_kib": round(peak / 1024, 1),
+            }
+            results[name] = result
+            status = compare(result, baseline_cases.get(name), tolerance)
+            regressions += status.endswith("REGRESSION")
+            print(
+                f"{name:<44}{seconds:>10.4f}"
+                f"{result['throughput']:>14.1f} {result['unit']:<7}"
+                f"{result['peak_kib']:>10.0f}  {status}"
+            )
+
+    if update_baseline:
+        cases = {**baseline.get("cases", {}), **results}
+        if baseline.get("encoding") not in (None, encoding_name):
+            cases = results
+        BASELINE_PATH.write_text(
+            json.dumps(
+                {
+                    "encoding": encoding_name,
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "cases": dict(sorted(cases.items())),
+                },
+                indent=2,
+            ) + "\n",
+            encoding="utf-8",
+        )
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--only", nargs="+", choices=GROUPS, default=GROUPS, help="Benchmark groups to run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per case; the best is reported"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown or memory growth over the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Record this run's results as the new baseline",
+    )
+    parser.add_argument(
+        "--pages",
+        help="Directory of saved .html pages for the parser group, such as "
+        "the .page_store folder in OUTPUT_DIR; defaults to the generated pages",
+    )
+    benchmark_args = parser.parse_args()
+    regression_count = run_benchmarks(
+        benchmark_args.only,
+        benchmark_args.repeat,
+        benchmark_args.tolerance,
+        benchmark_args.update_baseline,
+        benchmark_args.pages,
+    )
+    sys.exit(1 if regression_count else 0)
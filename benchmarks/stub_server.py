@@ -0,0 +1,278 @@
+"""
+Offline stand-ins for the OpenAI, Anthropic, and Ollama endpoints.
+
+StubServer listens on 127.0.0.1 and answers the requests the pipeline makes:
+GET /pages/{name} serves benchmark HTML, POST /v1/responses answers OpenAI
+and Ollama summaries, POST /v1/messages answers Claude summaries, and
+POST /v1/audio/speech returns fake MP3 bytes. Summary batches are accepted
+through /v1/files and /v1/batches (OpenAI) and /v1/messages/batches
+(Anthropic); each batch reports itself in progress once, then finished.
+Point the SDKs at it with OPENAI_BASE_URL, ANTHROPIC_BASE_URL, and
+OLLAMA_HOST.
+"""
+import itertools
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from corpus import synthetic_summary
+
+SUMMARY_CHARS = 6_000
+# An MPEG-1 Layer III frame header followed by padding, repeated; enough for
+# the pipeline, which only writes the bytes to disk.
+FAKE_MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        name = path.rsplit("/", 1)[-1]
+        if path.startswith("/pages/") and name in self.server.pages:
+            self._send(200, self.server.pages[name].encode("utf-8"), "text/html; charset=utf-8")
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            content = self.server.files.get(path.split("/")[3])
+            if content is None:
+                self._send(404, b"not found", "text/plain")
+            else:
+                self._send(200, content, "application/jsonl")
+        elif path.startswith("/v1/messages/batches/") and path.endswith("/results"):
+            batch = self.server.batches.get(path.split("/")[4])
+            if batch is None:
+                self._send(404, b"not found", "text/plain")
+            else:
+                self._send(200, batch["results"], "application/binary")
+        elif path.startswith("/v1/messages/batches/"):
+            self._send_batch(name, self._message_batch)
+        elif path.startswith("/v1/batches/"):
+            self._send_batch(name, self._openai_batch)
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.count(self.path)
+
+        if self.path.endswith("/files"):
+            # The batch input is the only multipart form field holding JSON lines.
+            lines = re.findall(rb'^\{"custom_id".*$', body, re.MULTILINE)
+            file_id = self.server.add_file(b"\n".join(line.rstrip(b"\r") for line in lines))
+            self._send_json({
+                "id": file_id, "object": "file", "bytes": len(body), "created_at": 0,
+                "filename": "batch.jsonl", "purpose": "batch", "status": "processed",
+            })
+            return
+
+        request = json.loads(body or b"{}")
+        if self.path.endswith("/responses"):
+            self._send_json(self._response(request))
+        elif self.path.endswith("/messages/batches"):
+            results = "".join(
+                json.dumps({
+                    "custom_id": item["custom_id"],
+                    "result": {"type": "succeeded", "message": self._message(item["params"])},
+                }) + "\n"
+                for item in request["requests"]
+            )
+            batch_id = self.server.add_batch(len(request["requests"]), results.encode("utf-8"))
+            self._send_json(self._message_batch(batch_id, self.server.batches[batch_id]))
+        elif self.path.endswith("/messages"):
+            self._send_json(self._message(request))
+        elif self.path.endswith("/batches"):
+            lines = self.server.files[request["input_file_id"]].decode("utf-8").splitlines()
+            results = "".join(
+                json.dumps({
+                    "id": f"batch_req_{number}",
+                    "custom_id": item["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": f"req_{number}",
+                        "body": self._response(item["body"]),
+                    },
+                    "error": None,
+                }) + "\n"
+                for number, item in enumerate(map(json.loads, lines))
+            )
+            batch_id = self.server.add_batch(
+                len(lines), results.encode("utf-8"), input_file_id=request["input_file_id"]
+            )
+            self._send_json(self._openai_batch(batch_id, self.server.batches[batch_id]))
+        elif self.path.endswith("/audio/speech"):
+            frames = max(1, len(request.get("input", "")) // 20)
+            self._send(200, FAKE_MP3_FRAME * frames, "audio/mpeg")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send_batch(self, batch_id, describe):
+        batch = self.server.poll_batch(batch_id)
+        if batch is None:
+            self._send(404, b"not found", "text/plain")
+        else:
+            self._send_json(describe(batch_id, batch))
+
+    def _openai_batch(self, batch_id, batch):
+        finished = batch["finished"]
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/responses",
+            "completion_window": "24h",
+            "created_at": 0,
+            "input_file_id": batch["input_file_id"],
+            "status": "completed" if finished else "in_progress",
+            "output_file_id": batch["output_file_id"] if finished else None,
+            "error_file_id": None,
+            "request_counts": {
+                "total": batch["size"],
+                "completed": batch["size"] if finished else 0,
+                "failed": 0,
+            },
+        }
+
+    def _message_batch(self, batch_id, batch):
+        finished = batch["finished"]
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if finished else "in_progress",
+            "request_counts": {
+                "processing": 0 if finished else batch["size"],
+                "succeeded": batch["size"] if finished else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": "2026-01-01T00:00:00Z",
+            "expires_at": "2026-01-02T00:00:00Z",
+            "ended_at": "2026-01-01T00:00:01Z" if finished else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": (
+                f"{self.server.base_url}/v1/messages/batches/{batch_id}/results"
+                if finished else None
+            ),
+        }
+
+    def _response(self, request):
+        text = synthetic_summary(SUMMARY_CHARS, seed=len(request.get("input", "")))
+        return {
+            "id": "resp_stub",
+            "object": "response",
+            "created_at": 0,
+            "model": request.get("model", "stub"),
+            "status": "completed",
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg_stub",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {"type": "output_text", "text": text, "annotations": []}
+                    ],
+                }
+            ],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": len(request.get("input", "")) // 4,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": len(text) // 4,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": (len(request.get("input", "")) + len(text)) // 4,
+            },
+        }
+
+    def _message(self, request):
+        prompt = request["messages"][0]["content"]
+        text = synthetic_summary(SUMMARY_CHARS, seed=len(prompt))
+        return {
+            "id": "msg_stub",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        }
+
+    def _send_json(self, payload):
+        self._send(200, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages):
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.pages = pages
+        self.requests = {}
+        self.files = {}
+        self.batches = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def add_file(self, content):
+        with self._lock:
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = content
+            return file_id
+
+    def add_batch(self, size, results, input_file_id=None):
+        """
+        Store a finished batch's results; it is reported in progress once.
+        """
+        with self._lock:
+            batch_id = f"batch_{next(self._ids)}"
+            output_file_id = f"file-{next(self._ids)}"
+            self.files[output_file_id] = results
+            self.batches[batch_id] = {
+                "size": size,
+                "results": results,
+                "input_file_id": input_file_id,
+                "output_file_id": output_file_id,
+                "polls": 0,
+                "finished": False,
+            }
+            return batch_id
+
+    def poll_batch(self, batch_id):
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is not None:
+                batch["finished"] = batch["polls"] > 0
+                batch["polls"] += 1
+            return batch
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()